@@ -1,68 +1,109 @@
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-import math
+from datetime import datetime
+from numba import njit
+
+_RNG = np.random.default_rng()
+
+
+@njit(cache=True)
+def _aggregate_daily(day_ids, n_days, tmin, tmax, pop, rain, wind):
+    # Single pass over the 3-hourly rows; NaN marks a missing reading.
+    out_tmin = np.full(n_days, np.inf)
+    out_tmax = np.full(n_days, -np.inf)
+    out_pop = np.full(n_days, -np.inf)
+    out_rain = np.zeros(n_days)
+    out_wind_sum = np.zeros(n_days)
+    out_wind_cnt = np.zeros(n_days, dtype=np.int64)
+    for i in range(day_ids.size):
+        d = day_ids[i]
+        if not np.isnan(tmin[i]) and tmin[i] < out_tmin[d]:
+            out_tmin[d] = tmin[i]
+        if not np.isnan(tmax[i]) and tmax[i] > out_tmax[d]:
+            out_tmax[d] = tmax[i]
+        if pop[i] > out_pop[d]:
+            out_pop[d] = pop[i]
+        out_rain[d] += rain[i]
+        if not np.isnan(wind[i]):
+            out_wind_sum[d] += wind[i]
+            out_wind_cnt[d] += 1
+    return out_tmin, out_tmax, out_pop, out_rain, out_wind_sum, out_wind_cnt
+
+
+
+def aggregate_daily(stamps, rows):
+    """
+    Reduce 3-hourly forecast rows to per-UTC-day values.
+    stamps are unix timestamps and rows are (tmin, tmax, pop, rain, wind)
+    tuples with NaN for missing readings. Returns (days, tmin, tmax, pop, rain,
+    wind) arrays sorted by day: days is the day index since the epoch, tmin/tmax
+    are +/-inf if a day had no reading and wind is the mean (NaN if none).
+    """
+    ts = np.asarray(stamps, dtype=np.int64)
+    # Column-major copy so each field is a contiguous 1-D buffer for the kernel
+    tmin, tmax, pop, rain, wind = np.ascontiguousarray(
+        np.array(rows, dtype=np.float64).reshape(-1, 5).T
+    )
+    days, day_ids = np.unique(ts // 86400, return_inverse=True)
+    out_tmin, out_tmax, out_pop, out_rain, wind_sum, wind_cnt = _aggregate_daily(
+        day_ids.astype(np.int64), days.size, tmin, tmax, pop, rain, wind
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out_wind = wind_sum / wind_cnt
+    return days, out_tmin, out_tmax, out_pop, out_rain, out_wind
 
 class WeatherAnalytics:
-    def __init__(self):
-        self.model = LinearRegression()
-    
     def generate_historical_data(self, current_temp, days_back=30):
-        dates = []
-        temps = []
-        humidity = []
-        rain = []
+        base_date = np.datetime64(datetime.now(), 'D')
         
-        base_date = datetime.now()
+        idx = np.arange(days_back, 0, -1)
+        dates = base_date - idx.astype('timedelta64[D]')
         
-        for i in range(days_back, 0, -1):
-            date = base_date - timedelta(days=i)
-            dates.append(date)
-            
-            day_of_year = date.timetuple().tm_yday
-            seasonal_factor = math.sin(2 * math.pi * day_of_year / 365) * 5
-            
-            temp = current_temp + seasonal_factor + np.random.normal(0, 2)
-            temps.append(round(temp, 1))
-            
-            hum = 60 + (25 - abs(temp - 25)) * 0.5 + np.random.normal(0, 5)
-            humidity.append(min(100, max(20, round(hum, 1))))
-            
-            rain_prob = max(0, min(100, 30 + seasonal_factor * 2 + np.random.normal(0, 10)))
-            rain.append(round(rain_prob, 1))
+        day_of_year = pd.DatetimeIndex(dates).dayofyear.to_numpy()
+        seasonal_factor = np.sin(2 * np.pi * day_of_year / 365.0) * 5
+        
+        # One draw for all three channels, scaled in place to sigma 2 / 5 / 10
+        noise = _RNG.standard_normal((3, days_back))
+        noise[0] *= 2
+        noise[1] *= 5
+        noise[2] *= 10
+        
+        temps = current_temp + seasonal_factor + noise[0]
+        hum = 60 + (25 - np.abs(temps - 25)) * 0.5 + noise[1]
+        rain = np.clip(30 + seasonal_factor * 2 + noise[2], 0, 100)
         
         return {
-            'dates': [d.strftime('%Y-%m-%d') for d in dates],
-            'temperatures': temps,
-            'humidity': humidity,
-            'rain_probability': rain
+            'dates': np.datetime_as_string(dates, unit='D').tolist(),
+            'temperatures': np.round(temps, 1).tolist(),
+            'humidity': np.clip(np.round(hum, 1), 20, 100).tolist(),
+            'rain_probability': np.round(rain, 1).tolist()
         }
     
     def predict_temperature_trend(self, historical_temps, future_days=7):
         if len(historical_temps) < 5:
             return None
             
-        X = np.array(range(len(historical_temps))).reshape(-1, 1)
-        y = np.array(historical_temps)
+        y = np.asarray(historical_temps, dtype=np.float64)
+        n = y.size
+        x = np.arange(n, dtype=np.float64)
         
-        self.model.fit(X, y)
+        # Closed-form least squares for a single feature
+        x_mean = (n - 1) / 2
+        slope = ((x - x_mean) * (y - y.mean())).sum() / ((x - x_mean) ** 2).sum()
+        intercept = y.mean() - slope * x_mean
         
-        future_X = np.array(range(len(historical_temps), 
-                                len(historical_temps) + future_days)).reshape(-1, 1)
-        predictions = self.model.predict(future_X)
+        predictions = intercept + slope * np.arange(n, n + future_days)
         
-        slope = self.model.coef_[0]
         trend = "increasing" if slope > 0.1 else "decreasing" if slope < -0.1 else "stable"
         
-        predictions_rounded = [round(p, 1) for p in predictions]
+        predictions_rounded = np.round(predictions, 1).tolist()
         confidence = min(95, max(60, 100 - abs(slope) * 10))
         
         return {
             'predictions': predictions_rounded,
             'trend': trend,
-            'slope': round(slope, 3),
-            'confidence': round(confidence, 1),
+            'slope': round(float(slope), 3),
+            'confidence': round(float(confidence), 1),
             'next_7_days': predictions_rounded[:7]
         }
     
@@ -70,24 +111,32 @@ class WeatherAnalytics:
         if len(historical_rain) < 5:
             return None
             
-        weights = np.array([0.5**i for i in range(len(historical_rain))][::-1])
-        weights = weights / weights.sum()
-        
-        base_pred = np.average(historical_rain[-5:])
+        hist = np.asarray(historical_rain, dtype=np.float64)
+        base_pred = hist[-5:].mean()
         
-        predictions = []
-        for i in range(future_days):
-            day_variation = np.sin(i * 0.9) * 3
-            pred = base_pred + day_variation + np.random.normal(0, 2)
-            predictions.append(max(0, min(100, round(pred, 1))))
+        days = np.arange(future_days)
+        pred = base_pred + np.sin(days * 0.9) * 3 + _RNG.normal(0, 2, future_days)
+        pred = np.clip(np.round(pred, 1), 0, 100)
+        predictions = pred.tolist()
         
-        recent_avg = np.mean(historical_rain[-7:])
-        older_avg = np.mean(historical_rain[:-7]) if len(historical_rain) > 7 else recent_avg
+        recent_avg = np.mean(hist[-7:])
+        older_avg = np.mean(hist[:-7]) if hist.size > 7 else recent_avg
         rain_trend = "increasing" if recent_avg > older_avg + 2 else "decreasing" if recent_avg < older_avg - 2 else "stable"
         
         return {
             'predictions': predictions,
             'trend': rain_trend,
             'next_7_days': predictions[:7],
-            'high_risk_days': [i for i, p in enumerate(predictions) if p > 70]
-        }
\ No newline at end of file
+            'high_risk_days': np.nonzero(pred > 70)[0].tolist()
+        }
+
+
+# Shared per-process instance; views use this rather than constructing their own
+ANALYTICS = WeatherAnalytics()
+
+# Warm everything at import so the first request doesn't pay for the Numba
+# compile (cached on disk by cache=True) or first-call NumPy/pandas setup
+aggregate_daily([0], [(0.0,) * 5])
+ANALYTICS.generate_historical_data(25.0, days_back=2)
+ANALYTICS.predict_temperature_trend([20.0] * 6)
+ANALYTICS.predict_rainfall([10.0] * 8)
@@ -0,0 +1,52 @@
+# api/geo_cache.py
+"""
+Tiny SQLite-backed geocode store. Coordinates for a city don't change, so
+keeping them on disk lets a freshly started process skip the OWM geocode call.
+"""
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+DB_PATH = settings.BASE_DIR / "geo_cache.sqlite3"
+
+# sqlite3 connections can't be shared across threads; callers reach us through
+# sync_to_async, so keep one connection per executor thread
+_local = threading.local()
+
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "city_key TEXT PRIMARY KEY, lat REAL, lon REAL, ts INTEGER)"
+        )
+        _local.conn = conn
+    return conn
+
+
+def get(key: str):
+    """Return (lat, lon) for key, or None if unknown or the store is unavailable."""
+    try:
+        row = _conn().execute(
+            "SELECT lat, lon FROM geocode WHERE city_key = ?", (key,)
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def put(key: str, lat: float, lon: float):
+    """Store (lat, lon) for key. Failures are ignored; this is only a cache."""
+    try:
+        with _conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode (city_key, lat, lon, ts) VALUES (?, ?, ?, ?)",
+                (key, lat, lon, int(time.time())),
+            )
+    except sqlite3.Error:
+        pass
@@ -1,3 +1,72 @@
-from django.test import TestCase
+import math
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .analytics import aggregate_daily
+from .views import _canon_city, _static_geo
+
+BACOLOD = (10.6765, 122.9509)
+QUEZON_CITY = (14.6760, 121.0437)
+
+
+class CanonCityTests(SimpleTestCase):
+    def test_equivalent_spellings_share_a_key(self):
+        self.assertEqual(_canon_city("Bacolod City, Philippines"), "bacolod city,ph")
+        self.assertEqual(_canon_city("bacolod   city ,philippines"), "bacolod city,ph")
+        self.assertEqual(_canon_city("  Bacolod,PH "), "bacolod,ph")
+
+    def test_trailing_commas_dropped(self):
+        self.assertEqual(_canon_city("Manila , ph,"), "manila,ph")
+
+
+class StaticGeoTests(SimpleTestCase):
+    def lookup(self, city):
+        return _static_geo(_canon_city(city))
+
+    def test_bacolod_variants_hit(self):
+        for city in [
+            "Bacolod",
+            "bacolod",
+            "Bacolod,PH",
+            "Bacolod City",
+            "Bacolod City, Philippines",
+            "Bacolod City, Negros Occidental, Philippines",
+        ]:
+            with self.subTest(city=city):
+                self.assertEqual(self.lookup(city), BACOLOD)
+
+    def test_quezon_city_hits_with_or_without_suffix(self):
+        self.assertEqual(self.lookup("Quezon City"), QUEZON_CITY)
+        self.assertEqual(self.lookup("quezon"), QUEZON_CITY)
+
+    def test_mismatched_province_falls_through(self):
+        # Naga, Cebu is not the Naga (Camarines Sur) in the table
+        self.assertIsNone(self.lookup("Naga, Cebu, Philippines"))
+        self.assertIsNone(self.lookup("Roxas, Isabela, Philippines"))
+
+    def test_other_country_falls_through(self):
+        self.assertIsNone(self.lookup("Manila, US"))
+
+    def test_province_without_country_falls_through(self):
+        self.assertIsNone(self.lookup("bacolod, negros occidental"))
+
+
+class AggregateDailyTests(SimpleTestCase):
+    def test_buckets_by_utc_day_and_skips_missing(self):
+        nan = float("nan")
+        day = 86400 * 20000
+        days, tmin, tmax, pop, rain, wind = aggregate_daily(
+            [day + 3600, day + 7200, day + 86400],
+            [
+                (20.0, 25.0, 10.0, 1.0, 2.0),
+                (nan, 27.0, 40.0, 0.5, nan),
+                (nan, nan, 0.0, 0.0, nan),
+            ],
+        )
+        self.assertEqual(days.tolist(), [20000, 20001])
+        self.assertEqual(tmin[0], 20.0)
+        self.assertEqual(tmax[0], 27.0)
+        self.assertEqual(pop[0], 40.0)
+        self.assertEqual(rain[0], 1.5)
+        self.assertEqual(wind[0], 2.0)
+        self.assertTrue(math.isinf(tmin[1]) and math.isnan(wind[1]))
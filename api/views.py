@@ -1,99 +1,229 @@
 # api/views.py
 import os
-import requests
-from datetime import datetime, timezone
-from collections import defaultdict
+import re
+import asyncio
+from contextlib import asynccontextmanager
+import httpx
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 import numpy as np
-from .analytics import WeatherAnalytics
+import orjson
+from . import geo_cache
+from .analytics import ANALYTICS, aggregate_daily
 
 from django.conf import settings
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
 from django.core.cache import cache
 
 OWM_API_KEY = settings.OWM_API_KEY
-SESSION = requests.Session()
 TIMEOUT = 12
+# How long a weather payload is kept around for revalidation after it goes stale
+STALE_TTL = 60 * 60
+# Transient gateway errors from OWM are retried a couple of times with backoff
+RETRY_STATUSES = {502, 503, 504}
+RETRIES = 2
+BACKOFF = 0.2
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
+GEO_URL = "https://api.openweathermap.org/geo/1.0/direct"
+CURRENT_URL = "https://api.openweathermap.org/data/2.5/weather"
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+
+# (loop, client) shared by every request on the ASGI worker's event loop
+_SHARED_CLIENT = None
+
+
+def _new_client():
+    # HTTP/2 keep-alive pool; retries=... covers connection failures only
+    return httpx.AsyncClient(
+        timeout=TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=RETRIES,
+            limits=httpx.Limits(max_keepalive_connections=32),
+        ),
+    )
+
+
+@asynccontextmanager
+async def _owm_client(request):
+    """
+    httpx client for one request. Under ASGI (uvicorn) the worker runs a single
+    long-lived loop, so one shared client pools connections across requests.
+    Under WSGI every async view runs on a throwaway loop, so the client is
+    opened and closed with the request instead of outliving its loop.
+    """
+    global _SHARED_CLIENT
+    loop = asyncio.get_running_loop()
+    if isinstance(request, ASGIRequest):
+        if _SHARED_CLIENT is None:
+            _SHARED_CLIENT = (loop, _new_client())
+        if _SHARED_CLIENT[0] is loop:
+            yield _SHARED_CLIENT[1]
+            return
+    async with _new_client() as client:
+        yield client
+
+
+async def _owm_get(client, url: str, params: dict, headers=None):
+    """GET that retries 502/503/504 with exponential backoff."""
+    for attempt in range(RETRIES + 1):
+        r = await client.get(url, params=params, headers=headers)
+        if r.status_code not in RETRY_STATUSES or attempt == RETRIES:
+            return r
+        await asyncio.sleep(BACKOFF * 2 ** attempt)
+
+
+def _ojson(payload, status=200):
+    # orjson is much faster than Django's JSONEncoder and handles NumPy scalars/arrays
+    return HttpResponse(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+        content_type="application/json",
+        status=status,
+    )
 
 def _json_error(message, status=400):
     # Always stringify exceptions so JSON encoding never fails
-    return JsonResponse({"error": str(message)}, status=status)
+    return _ojson({"error": str(message)}, status=status)
+
+def _num(value):
+    """None → NaN so missing readings can live in a float array."""
+    return np.nan if value is None else value
 
 def _require_key():
     if not OWM_API_KEY:
         raise RuntimeError("Missing OWM_API_KEY in environment/.env")
 
 
-def _geocode_city(city: str):
+def _canon_city(city: str) -> str:
     """
-    Resolve a city string to (lat, lon). We are defensive here:
-    - Accept long strings like 'Bacolod City, Negros Occidental, Philippines'
-    - Try several simplified variants: 'Bacolod,PH', 'Bacolod'
-    Result is cached for 1 day.
+    Canonical form used for cache keys, so equivalent inputs share an entry:
+    'Bacolod City, Philippines' and 'bacolod city,ph' both become 'bacolod city,ph'.
     """
-    if not city:
-        city = "Bacolod,PH"
+    s = re.sub(r"\s+", " ", city.strip().lower())
+    s = re.sub(r"\s*,\s*", ",", s).strip(",")
+    if s.endswith(",philippines"):
+        s = s[: -len("philippines")] + "ph"
+    return s
 
-    key = f"geocode:{city.lower()}"
-    cached = cache.get(key)
-    if cached:
-        return cached
 
-    _require_key()
+def _city_slug(name: str) -> str:
+    """'Bacolod City' and 'bacolod' share one _STATIC_GEO entry."""
+    if name.endswith(" city"):
+        name = name[: -len(" city")]
+    return f"{name},ph"
+
+
+# Top PH cities (city_slug -> lat, lon, lowercased province); resolved without
+# touching cache or OWM
+_STATIC_GEO: dict[str, tuple] = {
+    _city_slug(k.split(",")[0]): (lat, lon, province.lower())
+    for k, (lat, lon, province) in orjson.loads(
+        (Path(__file__).parent / "cities_ph.json").read_bytes()
+    ).items()
+}
 
+
+def _static_geo(canon: str):
+    """
+    (lat, lon) for a canonical city string from _STATIC_GEO, or None.
+    'bacolod', 'Bacolod,PH' and 'Bacolod City, Negros Occidental, Philippines'
+    all hit. A middle component that doesn't match the table's province
+    ('Naga, Cebu, Philippines') or a non-PH country falls through to
+    cache/OWM, so explicitly disambiguated places aren't misresolved.
+    """
+    parts = canon.split(",")
+    if len(parts) > 1 and parts[-1] != "ph":
+        return None
+    entry = _STATIC_GEO.get(_city_slug(parts[0]))
+    if entry is None:
+        return None
+    lat, lon, province = entry
+    middle = parts[1:-1]
+    if middle and middle != [province]:
+        return None
+    return lat, lon
+
+
+def _geocode_candidates(city: str):
+    """Candidate OWM queries for a city string, most specific first."""
     base = city.strip()
     lowered = base.lower()
-
-    # Build candidate queries, most specific first
-    candidates = []
+    first_part = base.split(",", 1)[0].strip()  # e.g. 'Bacolod City'
+    has_country = ",ph" in lowered or "philippines" in lowered
 
     # 1. Whatever the frontend sent
-    candidates.append(base)
+    candidates = [base]
 
     # 2. If it includes "Philippines", strip that and add ",PH"
     if "philippines" in lowered:
-        first_part = base.split(",")[0].strip()  # e.g. 'Bacolod City'
-        candidates.append(f"{first_part},PH")
-        candidates.append(first_part)
+        candidates += [f"{first_part},PH", first_part]
 
     # 3. If it has commas but no 'Philippines', also try first part & first+PH
-    if "," in base and "philippines" not in lowered:
-        first_part = base.split(",")[0].strip()
-        candidates.append(first_part)
-        candidates.append(f"{first_part},PH")
+    elif "," in base:
+        candidates += [first_part, f"{first_part},PH"]
 
     # 4. If it still doesn't explicitly specify country, try adding PH
-    if ",ph" not in lowered and "philippines" not in lowered:
-        short = base.split(",")[0].strip()
-        candidates.append(f"{short},PH")
+    if not has_country:
+        candidates.append(f"{first_part},PH")
 
-    # Deduplicate while preserving order
-    seen = set()
-    final_candidates = []
+    # Deduplicate case-insensitively, preserving order (first spelling wins)
+    unique = {}
     for q in candidates:
-        q_norm = q.strip().lower()
-        if q_norm and q_norm not in seen:
-            seen.add(q_norm)
-            final_candidates.append(q.strip())
+        if q:
+            unique.setdefault(q.lower(), q)
+    return list(unique.values())
+
+
+async def _geocode_city(client, city: str):
+    """
+    Resolve a city string to (lat, lon). We are defensive here:
+    - Accept long strings like 'Bacolod City, Negros Occidental, Philippines'
+    - Try several simplified variants: 'Bacolod,PH', 'Bacolod'
+    Known PH cities are answered from _STATIC_GEO; anything else is
+    cached for 1 day under its canonical name and persisted in geo_cache.
+    """
+    if not city:
+        city = "Bacolod,PH"
+
+    canon = _canon_city(city)
+    static = _static_geo(canon)
+    if static:
+        return static
 
-    url = "https://api.openweathermap.org/geo/1.0/direct"
+    key = f"geocode:{canon}"
+    cached = await cache.aget(key)
+    if cached:
+        return cached
+
+    # Survives restarts, unlike the Django cache on a fresh deploy. SQLite calls
+    # block (a locked db waits up to 5s), so keep them off the event loop.
+    stored = await sync_to_async(geo_cache.get)(key)
+    if stored:
+        await cache.aset(key, stored, 60 * 60 * 24)
+        return stored
+
+    _require_key()
 
     last_err = None
-    for q in final_candidates:
+    for q in _geocode_candidates(city):
         try:
             params = {"q": q, "limit": 1, "appid": OWM_API_KEY}
-            r = SESSION.get(url, params=params, timeout=TIMEOUT)
+            r = await _owm_get(client, GEO_URL, params)
             r.raise_for_status()
-            arr = r.json()
+            arr = orjson.loads(r.content)
             if not arr:
                 # no result for this candidate, try next
                 continue
             item = arr[0]
             lat, lon = float(item["lat"]), float(item["lon"])
-            cache.set(key, (lat, lon), 60 * 60 * 24)
+            await cache.aset(key, (lat, lon), 60 * 60 * 24)
+            await sync_to_async(geo_cache.put)(key, lat, lon)
             return lat, lon
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             last_err = e
             continue
 
@@ -103,37 +233,66 @@ def _geocode_city(city: str):
     raise RuntimeError(f"City not found: {city}")
 
 
-def _current_weather(lat: float, lon: float):
-    """Current weather (free endpoint). Cache 60s."""
-    key = f"wx:current:{lat:.4f}:{lon:.4f}"
-    cached = cache.get(key)
+def _revalidation_headers(stale):
+    headers = {}
+    if stale:
+        if stale.get("etag"):
+            headers["If-None-Match"] = stale["etag"]
+        if stale.get("lm"):
+            headers["If-Modified-Since"] = stale["lm"]
+    return headers
+
+
+def _cache_entry(r):
+    return {
+        "data": orjson.loads(r.content),
+        "etag": r.headers.get("ETag"),
+        "lm": r.headers.get("Last-Modified"),
+    }
+
+
+async def _conditional_get(client, key: str, url: str, params: dict, ttl: int):
+    """
+    GET with a read-through cache of {data, etag, lm}.
+    A longer-lived stale copy is kept so that, once the fresh entry expires,
+    we can revalidate with If-None-Match / If-Modified-Since and reuse the
+    cached body on a 304 instead of downloading it again.
+    """
+    cached = await cache.aget(key)
     if cached:
-        return cached
+        return cached["data"]
     _require_key()
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {"lat": lat, "lon": lon, "appid": OWM_API_KEY, "units": "metric"}
-    r = SESSION.get(url, params=params, timeout=TIMEOUT)
-    r.raise_for_status()
-    data = r.json()
-    cache.set(key, data, 60)
-    return data
-
-def _forecast_5d3h(lat: float, lon: float):
+
+    stale_key = f"{key}:stale"
+    stale = await cache.aget(stale_key)
+    headers = _revalidation_headers(stale)
+
+    r = await _owm_get(client, url, params, headers=headers)
+    if r.status_code == 304 and stale:
+        entry = stale
+    else:
+        r.raise_for_status()
+        entry = _cache_entry(r)
+    await cache.aset(key, entry, ttl)
+    await cache.aset(stale_key, entry, STALE_TTL)
+    return entry["data"]
+
+
+def _weather_params(lat: float, lon: float):
+    return {"lat": lat, "lon": lon, "appid": OWM_API_KEY, "units": "metric"}
+
+
+async def _current_weather(client, lat: float, lon: float):
+    """Current weather (free endpoint). Cache 60s."""
+    key = f"wx:current:{lat:.4f}:{lon:.4f}"
+    return await _conditional_get(client, key, CURRENT_URL, _weather_params(lat, lon), 60)
+
+async def _forecast_5d3h(client, lat: float, lon: float):
     """5-day / 3-hour forecast (free endpoint). Cache 3 min."""
     key = f"wx:fcst:{lat:.4f}:{lon:.4f}"
-    cached = cache.get(key)
-    if cached:
-        return cached
-    _require_key()
-    url = "https://api.openweathermap.org/data/2.5/forecast"
-    params = {"lat": lat, "lon": lon, "appid": OWM_API_KEY, "units": "metric"}
-    r = SESSION.get(url, params=params, timeout=TIMEOUT)
-    r.raise_for_status()
-    data = r.json()
-    cache.set(key, data, 60 * 3)
-    return data
-
-def weather_summary(request):
+    return await _conditional_get(client, key, FORECAST_URL, _weather_params(lat, lon), 60 * 3)
+
+async def weather_summary(request):
     """
     Returns:
     {
@@ -149,10 +308,13 @@ def weather_summary(request):
     try:
         # default to Bacolod,PH if nothing is passed
         city = request.GET.get("city") or "Bacolod,PH"
-        lat, lon = _geocode_city(city)
+        async with _owm_client(request) as client:
+            lat, lon = await _geocode_city(client, city)
 
-        wx = _current_weather(lat, lon)
-        fc = _forecast_5d3h(lat, lon)
+            # Independent once lat/lon is known; wait on both at once
+            wx, fc = await asyncio.gather(
+                _current_weather(client, lat, lon), _forecast_5d3h(client, lat, lon)
+            )
 
         # Current
         current = {
@@ -171,41 +333,35 @@ def weather_summary(request):
         }
 
         # Aggregate 3-hourly list into daily metrics (up to 5 days)
-        buckets = defaultdict(lambda: {
-            "temps_min": [], "temps_max": [], "pops": [], "rains": [], "winds": []
-        })
+        # One (tmin, tmax, pop, rain, wind) row per 3-hourly entry, None → NaN
+        stamps = []
+        rows = []
         for item in (fc.get("list") or []):
             ts = item.get("dt")
             if not ts:
                 continue
-            date_key = datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d")
             main = item.get("main", {})
-            wind = item.get("wind", {})
-            pop = item.get("pop", 0) or 0
-            rain_mm = (item.get("rain", {}) or {}).get("3h", 0) or 0
-
-            buckets[date_key]["temps_min"].append(main.get("temp_min"))
-            buckets[date_key]["temps_max"].append(main.get("temp_max"))
-            buckets[date_key]["pops"].append(pop * 100.0)
-            buckets[date_key]["rains"].append(rain_mm)
-            buckets[date_key]["winds"].append(wind.get("speed"))
+            stamps.append(ts)
+            rows.append((
+                _num(main.get("temp_min")),
+                _num(main.get("temp_max")),
+                (item.get("pop", 0) or 0) * 100.0,
+                (item.get("rain", {}) or {}).get("3h", 0) or 0,
+                _num(item.get("wind", {}).get("speed")),
+            ))
+        days, out_tmin, out_tmax, out_pop, out_rain, out_wind = aggregate_daily(stamps, rows)
 
         # Produce sorted daily rows (today → +4)
         daily_rows = []
-        for day in sorted(buckets.keys())[:5]:
-            b = buckets[day]
-            temps_min = [t for t in b["temps_min"] if t is not None]
-            temps_max = [t for t in b["temps_max"] if t is not None]
-            winds = [w for w in b["winds"] if w is not None]
-
+        for d in range(min(5, days.size)):
             daily_rows.append({
-                "date": day,
-                "temp_min": round(min(temps_min), 1) if temps_min else None,
-                "temp_max": round(max(temps_max), 1) if temps_max else None,
-                "pop": round(max(b["pops"]), 1) if b["pops"] else None,
-                "rain_mm": round(sum(b["rains"]), 1) if b["rains"] else 0,
+                "date": (_EPOCH + timedelta(days=int(days[d]))).strftime("%Y-%m-%d"),
+                "temp_min": round(float(out_tmin[d]), 1) if np.isfinite(out_tmin[d]) else None,
+                "temp_max": round(float(out_tmax[d]), 1) if np.isfinite(out_tmax[d]) else None,
+                "pop": round(float(out_pop[d]), 1),
+                "rain_mm": round(float(out_rain[d]), 1),
                 "wind_speed": (
-                    round(sum(winds) / max(1, len(winds)), 1) if winds else None
+                    round(float(out_wind[d]), 1) if np.isfinite(out_wind[d]) else None
                 ),
             })
 
@@ -216,8 +372,10 @@ def weather_summary(request):
             "current": current,
             "daily": daily_rows,
         }
-        return JsonResponse(payload)
-    except requests.HTTPError as e:
+        return _ojson(payload)
+    except httpx.TimeoutException:
+        return _json_error("Timed out waiting for OpenWeatherMap", status=504)
+    except httpx.HTTPStatusError as e:
         try:
             return _json_error(e.response.json(), status=e.response.status_code)
         except Exception:
@@ -226,29 +384,24 @@ def weather_summary(request):
         return _json_error(e, status=500)
 
 
-# --- Your analytics placeholders (unchanged) ---
-
-def metrics(request):
-    return _json_error("Use /api/weather/summary instead for weather KPIs.", status=400)
+# --- Analytics ---
 
-def timeseries(request):
-    return _json_error("Use /api/weather/summary instead for weather KPIs.", status=400)
-
-def forecast(request):
-    return _json_error("Use /api/weather/summary instead for weather KPIs.", status=400)
+# Static payload: serialize once at import and let browsers/CDNs cache it
+_FEATURE_BYTES = orjson.dumps([
+    {"feature": "humidity", "importance": 0.30},
+    {"feature": "pressure", "importance": 0.22},
+    {"feature": "temp_day", "importance": 0.20},
+    {"feature": "wind_speed", "importance": 0.15},
+    {"feature": "clouds", "importance": 0.13},
+])
 
 def feature_importance(request):
-    data = [
-        {"feature": "humidity", "importance": 0.30},
-        {"feature": "pressure", "importance": 0.22},
-        {"feature": "temp_day", "importance": 0.20},
-        {"feature": "wind_speed", "importance": 0.15},
-        {"feature": "clouds", "importance": 0.13},
-    ]
-    return JsonResponse(data, safe=False)
+    response = HttpResponse(_FEATURE_BYTES, content_type="application/json")
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
 
 # Add this at the very bottom of views.py
-def weather_analytics(request):
+async def weather_analytics(request):
     """
     Linear regression analytics for weather predictions
     Returns temperature trends, rainfall predictions, and insights
@@ -256,21 +409,19 @@ def weather_analytics(request):
     try:
         # Get city from request
         city = request.GET.get("city") or "Bacolod,PH"
-        lat, lon = _geocode_city(city)
-        
-        # Get current weather to use as base temperature
-        wx = _current_weather(lat, lon)
+        async with _owm_client(request) as client:
+            lat, lon = await _geocode_city(client, city)
+
+            # Get current weather to use as base temperature
+            wx = await _current_weather(client, lat, lon)
         current_temp = wx.get("main", {}).get("temp", 25)  # Default 25°C if missing
         
-        # Initialize analytics
-        analytics = WeatherAnalytics()
-        
         # Generate historical data (simulated - in real app, use actual historical data)
-        historical = analytics.generate_historical_data(current_temp, days_back=90)
+        historical = ANALYTICS.generate_historical_data(current_temp, days_back=90)
         
         # Make predictions using linear regression
-        temp_predictions = analytics.predict_temperature_trend(historical['temperatures'])
-        rain_predictions = analytics.predict_rainfall(historical['rain_probability'])
+        temp_predictions = ANALYTICS.predict_temperature_trend(historical['temperatures'])
+        rain_predictions = ANALYTICS.predict_rainfall(historical['rain_probability'])
         
         # Generate insights
         insights = []
@@ -325,7 +476,7 @@ def weather_analytics(request):
             }
         }
         
-        return JsonResponse(payload)
+        return _ojson(payload)
         
     except Exception as e:
         return _json_error(str(e), status=500)
@@ -4,14 +4,16 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()  # loads .env in project root
-OWM_API_KEY = os.environ.get("OWM_API_KEY")
-CORS_ALLOWED_ORIGIN = os.environ.get("CORS_ALLOWED_ORIGIN")
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "dev-secret")
-DEBUG = True
+# Off unless explicitly enabled: DEBUG keeps every SQL query in memory per request
+DEBUG = os.environ.get("DJANGO_DEBUG", "0") == "1"
 
-ALLOWED_HOSTS = ["*"]
+ALLOWED_HOSTS = os.environ.get(
+    "DJANGO_ALLOWED_HOSTS",
+    "itl-411-finals-backend.onrender.com,localhost,127.0.0.1",
+).split(",")
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -25,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "django.middleware.gzip.GZipMiddleware",  # compress JSON payloads; keep first
     "corsheaders.middleware.CorsMiddleware",  # must be high
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -70,6 +73,8 @@ USE_TZ = True
 STATIC_URL = "static/"
 
 # ---- CORS ----
+# CORS_ALLOWED_ORIGINS (comma-separated) replaces the defaults below;
+# CORS_ALLOWED_ORIGIN from .env adds one extra origin for local frontends.
 CORS_ALLOWED_ORIGINS = [
     # Local dev (Vite)
     "http://localhost:5173",
@@ -78,6 +83,11 @@ CORS_ALLOWED_ORIGINS = [
     # Production frontend (Netlify)
     "https://itl-411-weather-app.netlify.app",
 ]
+if os.environ.get("CORS_ALLOWED_ORIGINS"):
+    CORS_ALLOWED_ORIGINS = os.environ["CORS_ALLOWED_ORIGINS"].split(",")
+_extra_origin = os.environ.get("CORS_ALLOWED_ORIGIN")
+if _extra_origin and _extra_origin not in CORS_ALLOWED_ORIGINS:
+    CORS_ALLOWED_ORIGINS.append(_extra_origin)
 
 # We are NOT sending cookies from the frontend, so keep this False
 CORS_ALLOW_CREDENTIALS = False
@@ -85,13 +95,28 @@ CSRF_TRUSTED_ORIGINS = [
     "https://itl-411-finals-backend.onrender.com",
     "https://itl-411-weather-app.netlify.app",
 ]
-# ---- Cache (simple, in-memory) ----
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "weather-cache",
+# ---- Cache ----
+# Redis is shared by every worker process, so OWM responses are fetched once
+# per TTL rather than once per worker. Falls back to in-memory for local dev.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                "SERIALIZER": "django_redis.serializers.msgpack.MSGPackSerializer",
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "weather-cache",
+        }
     }
-}
 
 # OpenWeatherMap key
 OWM_API_KEY = os.environ.get("OWM_API_KEY", "")